@@ -1,11 +1,19 @@
-import os, json, logging, random, time, math, pickle
-from functools import wraps
+import os, json, logging, random, time, math, pickle, threading
+
+# 1-row, 7-feature predictions don't benefit from BLAS/OpenMP thread teams; the
+# setup cost exceeds the arithmetic. Must be set before NumPy is imported.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+from collections import defaultdict
+from functools import lru_cache, wraps
 from pathlib import Path
 from typing import Dict, Any, Tuple, Optional, List
 
-from flask import Flask, request, jsonify
+import numpy as np
+from flask import Flask, Response, request
 from flask_cors import CORS
-from prometheus_client import Counter, Gauge, Summary, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Summary, make_wsgi_app
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 try:
@@ -13,14 +21,37 @@ try:
 except ImportError:
     joblib = None
 
+try:
+    from numba import njit      # optional: JIT for the heuristic scorer
+except ImportError:
+    njit = None
+
+try:
+    import orjson               # optional: faster JSON encode/decode on the hot path
+except ImportError:
+    orjson = None
+
+try:   # optional: NumPy-only scorer for exported linear models (copied next to the app)
+    from ml_model.convert_to_safetensors import LinearScorer
+except ImportError:
+    LinearScorer = None
+
+try:
+    import redis                # optional: shared rate-limit counters
+except ImportError:
+    redis = None
+
 # ─────────────────────────── Config ────────────────────────────
 class Config:
     LOG_LEVEL            = os.getenv("LOG_LEVEL", "INFO").upper()
     RATE_LIMIT           = int(os.getenv("RATE_LIMIT", "200"))
+    RATE_LIMIT_WINDOW    = int(os.getenv("RATE_LIMIT_WINDOW_SEC", "60"))
+    RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
     FAILURE_PROB         = float(os.getenv("FAILURE_INJECTION_PROB", "0.0"))
     CORS_ALLOW_ORIGINS   = os.getenv("CORS_ALLOW_ORIGINS", "*")
     MODEL_PATH           = os.getenv("MODEL_PATH", "ml_model/models/model.pkl")
     RISK_HIGH_THRESHOLD  = float(os.getenv("RISK_HIGH_THRESHOLD", "0.7"))
+    DISABLE_RATE_LIMIT   = os.getenv("DISABLE_RATE_LIMIT", "false").lower() == "true"
 
 REQUIRED_FEATURES: List[str] = [
     "restart_count_last_5m", "cpu_usage_pct", "memory_usage_bytes",
@@ -46,13 +77,71 @@ FAILURE_PROB    = Gauge("predicted_failure_probability", "Predicted failure prob
 PREDICT_DURATION= Summary("predict_duration_seconds", "Time taken for prediction")
 REQ_LATENCY     = Summary("api_request_latency_seconds", "Request latency", ["path"])
 
+# label children bound once; .labels() hashes + locks on every call
+_HTTP = {(m, s): HTTP_REQS.labels(method=m, status=s)
+         for m in ("GET", "POST") for s in ("200", "400", "429", "500")}
+_PREDICT_LATENCY = REQ_LATENCY.labels(path="/predict")
+
+def _http_counter(method: str, status: str):
+    c = _HTTP.get((method, status))
+    return c if c is not None else HTTP_REQS.labels(method=method, status=status)
+
+# Request counts are accumulated per thread and pushed to HTTP_REQS in
+# batches, so the counter lock is taken once per flush instead of per request.
+# Each thread only writes its own running totals; the flusher only reads them.
+_FLUSH_INTERVAL_SEC = 0.25
+
+class _PendingCounts(dict):
+    __slots__ = ("flushed",)
+
+    def __init__(self):
+        super().__init__()
+        self.flushed: Dict[Tuple[str, str], int] = {}
+
+_pending: Dict[int, _PendingCounts] = {}        # native thread id -> running totals
+_pending_lock = threading.Lock()
+_flusher_pid: Optional[int] = None
+
+def _flush_pending() -> None:
+    with _pending_lock:
+        for acc in list(_pending.values()):
+            for key, total in acc.copy().items():
+                delta = total - acc.flushed.get(key, 0)
+                if delta:
+                    _http_counter(*key).inc(delta)
+                    acc.flushed[key] = total
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(_FLUSH_INTERVAL_SEC)
+        try:
+            _flush_pending()
+        except Exception:
+            logger.exception("metrics flush failed")
+
+def _register_pending() -> _PendingCounts:
+    global _flusher_pid
+    acc = _pending[threading.get_native_id()] = _PendingCounts()
+    with _pending_lock:
+        if _flusher_pid != os.getpid():     # started lazily: threads don't survive a (pre)fork
+            _flusher_pid = os.getpid()
+            threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+    return acc
+
+def _count(method: str, status: str) -> None:
+    acc = _pending.get(threading.get_native_id())
+    if acc is None:
+        acc = _register_pending()
+    key = (method, status)
+    acc[key] = acc.get(key, 0) + 1
+
 # ─────────────────────── Model loading ─────────────────────────
 _model: Optional[Any] = None
 _model_err: Optional[str] = None
 
 def _resolve_model_path() -> Optional[str]:
     for p in (
-        os.getenv("MODEL_PATH", Config.MODEL_PATH),
+        Config.MODEL_PATH,
         "ml_model/models/model.pkl", "ml_model/models/model.joblib",
         "ml_model/model.pkl",        "ml_model/model.joblib",
     ):
@@ -60,152 +149,270 @@ def _resolve_model_path() -> Optional[str]:
             return p
     return None
 
+_model_path: Optional[str] = _resolve_model_path()
+
+def _cached_model_path() -> Optional[str]:
+    """Resolved at import; only re-walked (stat per candidate) until a load has been attempted.
+    _resolve_model_path only returns existing files, so a non-None path also means it exists."""
+    global _model_path
+    if _model is None and _model_err is None:
+        _model_path = _resolve_model_path()
+    return _model_path
+
+def _pickle_load(path: str) -> Any:
+    with open(path, "rb") as fh:
+        return pickle.load(fh)
+
 def _load_model_if_needed() -> None:
     global _model, _model_err
     if _model is not None or _model_err is not None:
         return
-    path = _resolve_model_path()
+    path = _cached_model_path()
     if not path:
         _model_err = "Model not found – heuristic fallback in use"
         logger.warning(_model_err); return
 
+    exported = Path(path).with_suffix(".safetensors")
+    if LinearScorer is not None and exported.exists():
+        try:
+            scorer = LinearScorer(exported)
+            if scorer.features != REQUIRED_FEATURES:
+                raise ValueError(f"exported feature order {scorer.features} != {REQUIRED_FEATURES}")
+            _model = scorer
+            logger.info("Loaded exported linear model from %s", exported)
+        except Exception as e:
+            logger.warning("Could not load %s (%s); loading %s instead", exported, e, path)
+
+    if _model is None:
+        try:
+            if joblib:
+                try:       # most robust for sklearn objects; ndarrays mmap'd (shared across forked workers)
+                    _model = joblib.load(path, mmap_mode="r")
+                except Exception as je:
+                    logger.warning("joblib.load failed (%s); trying pickle", je)
+                    _model = _pickle_load(path)
+            else:
+                _model = _pickle_load(path)
+            logger.info("Loaded model from %s", path)
+        except Exception as e:
+            _model_err = f"Failed to load model: {e}"
+            logger.exception(_model_err); return
+
+    # warm-up: first predict_proba pays sklearn input validation + BLAS init; do it now
     try:
-        if joblib:
-            try:           # most robust for sklearn objects
-                _model = joblib.load(path)
-            except Exception as je:
-                logger.warning("joblib.load failed (%s); trying pickle", je)
-                _model = pickle.load(open(path, "rb"))
-        else:
-            _model = pickle.load(open(path, "rb"))
-        logger.info("Loaded model from %s", path)
+        _model.predict_proba(np.zeros((1, len(REQUIRED_FEATURES)), dtype=np.float64))
     except Exception as e:
-        _model_err = f"Failed to load model: {e}"
-        logger.exception(_model_err)
+        logger.warning("Model warm-up predict failed (%s); requests may use the heuristic", e)
 
 # ───────────────────────── Utilities ───────────────────────────
+_loads = orjson.loads if orjson is not None else json.loads
+
+def _json(obj: Any, status: int = 200) -> Response:
+    body = orjson.dumps(obj) if orjson is not None else json.dumps(obj)
+    return Response(body, status=status, mimetype="application/json")
+
 def _json_error(msg: str, code: int = 400):
-    HTTP_REQS.labels(method=request.method, status=str(code)).inc()
-    return jsonify({"ok": False, "error": msg}), code
+    _count(request.method, str(code))
+    return _json({"ok": False, "error": msg}, code)
 
 def _coerce_float(x) -> float:
     if x in (None, ""): return 0.0
     try:   return float(x)
     except Exception: raise ValueError(f"Cannot convert '{x}' to float")
 
-def _validate(payload: Dict[str, Any]) -> Tuple[Optional[Dict[str, float]], Optional[str]]:
+# clamp bounds, positional in REQUIRED_FEATURES order
+_FEATURE_LO = np.zeros(len(REQUIRED_FEATURES), dtype=np.float64)
+_FEATURE_HI = np.array([np.inf, 100.0, np.inf, 1.0, np.inf, np.inf, np.inf], dtype=np.float64)
+
+def _validate(payload: Dict[str, Any]) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    """Returns the features as a (n_features,) float64 row in REQUIRED_FEATURES order."""
     missing = [k for k in REQUIRED_FEATURES if k not in payload]
     if missing: return None, f"Missing features: {', '.join(missing)}"
     try:
-        f = {
-            "restart_count_last_5m"      : max(0.0, _coerce_float(payload["restart_count_last_5m"])),
-            "cpu_usage_pct"              : min(max(_coerce_float(payload["cpu_usage_pct"]), 0.0), 100.0),
-            "memory_usage_bytes"         : max(0.0, _coerce_float(payload["memory_usage_bytes"])),
-            "ready_replica_ratio"        : min(max(_coerce_float(payload["ready_replica_ratio"]), 0.0), 1.0),
-            "unavailable_replicas"       : max(0.0, _coerce_float(payload["unavailable_replicas"])),
-            "network_receive_bytes_per_s": max(0.0, _coerce_float(payload["network_receive_bytes_per_s"])),
-            "http_5xx_error_rate"        : max(0.0, _coerce_float(payload["http_5xx_error_rate"])),
-        }
+        # a fresh row per request: under gevent, requests on one OS thread interleave,
+        # so a shared buffer could echo another request's features
+        x = np.fromiter((_coerce_float(payload[k]) for k in REQUIRED_FEATURES),
+                        dtype=np.float64, count=len(REQUIRED_FEATURES))
     except ValueError as ve:
         return None, str(ve)
-    return f, None
+    np.clip(x, _FEATURE_LO, _FEATURE_HI, out=x)
+    return x, None
 
-def _predict_probability(f: Dict[str, float]) -> float:
+def features_to_dict(x: np.ndarray) -> Dict[str, float]:
+    return dict(zip(REQUIRED_FEATURES, x.tolist()))
+
+def _heuristic_score(r: float, cpu: float, mem: float, ratio: float,
+                     unavail: float, net: float, e5xx: float) -> float:
+    s = 0.25*r + 1.2*cpu + 0.6*mem + 1.5*ratio + 0.3*unavail + 0.4*net + 2.0*e5xx
+    return 1.0 / (1.0 + math.exp(-s))       # sigmoid, single exp
+
+if njit is not None:
+    _heuristic_score = njit(cache=True, fastmath=True)(_heuristic_score)
+    _heuristic_score(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)   # warm-up: compile at import, not on 1st request
+
+def _predict_probability(x: np.ndarray) -> float:
     _load_model_if_needed()
     if _model is not None:
         try:
-            X = [[f[k] for k in REQUIRED_FEATURES]]
-            prob = float(getattr(_model, "predict_proba")(X)[0][1])
+            prob = float(_model.predict_proba(x.reshape(1, -1))[0, 1])
             return max(0.0, min(prob, 1.0))
         except Exception as e:
             logger.warning("Model inference failed, fallback used: %s", e)
 
     # heuristic (logistic-style)
-    r, cpu, mem = f["restart_count_last_5m"], f["cpu_usage_pct"]/100, min(f["memory_usage_bytes"]/(1024**3), 1.0)
-    ratio, unavail = 1.0-f["ready_replica_ratio"], f["unavailable_replicas"]
-    net = min(f["network_receive_bytes_per_s"]/(1024**2), 1.0)
-    e5xx = f["http_5xx_error_rate"]
-    s = 0.25*r + 1.2*cpu + 0.6*mem + 1.5*ratio + 0.3*unavail + 0.4*net + 2.0*e5xx
-    return max(0.0, min(1 - math.exp(-s)/(1+math.exp(-s)), 1.0))
+    r, cpu, mem, rdy, unavail, net, e5xx = x.tolist()
+    cpu, mem = cpu/100, min(mem/(1024**3), 1.0)
+    ratio = 1.0-rdy
+    net = min(net/(1024**2), 1.0)
+    return _heuristic_score(r, cpu, mem, ratio, unavail, net, e5xx)   # sigmoid: already in (0, 1)
 
 # ───────────────────── Simple in-mem rate-limit ────────────────
-REQUEST_COUNTS: Dict[str, int] = {}
+class _LocalWindowCounter:
+    """Fixed-window counter per key, process-local. Stale windows are purged periodically."""
+    GC_AFTER_WINDOWS = 5
+
+    def __init__(self, window: int):
+        self.window = window
+        self.counts: Dict[str, Tuple[int, float]] = defaultdict(lambda: (0, 0.0))  # key -> (count, window_start)
+        self._lock = threading.Lock()
+        self._last_gc = time.monotonic()
+
+    def hit(self, key: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            count, start = self.counts[key]
+            if now - start >= self.window:
+                count, start = 0, now
+            count += 1
+            self.counts[key] = (count, start)
+            if now - self._last_gc >= self.window:
+                self._gc(now)
+            return count
+
+    def _gc(self, now: float) -> None:
+        horizon = self.GC_AFTER_WINDOWS * self.window
+        for k in [k for k, (_, start) in self.counts.items() if now - start >= horizon]:
+            del self.counts[k]
+        self._last_gc = now
+
+class _RedisWindowCounter:
+    """Same contract backed by Redis: INCR + EXPIRE on first hit, atomic via Lua."""
+    _SCRIPT = (
+        "local n = redis.call('INCR', KEYS[1]) "
+        "if n == 1 then redis.call('EXPIRE', KEYS[1], ARGV[1]) end "
+        "return n"
+    )
+
+    def __init__(self, url: str, window: int):
+        self.window = window
+        client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._incr = client.register_script(self._SCRIPT)
+        self._fallback = _LocalWindowCounter(window)   # used while Redis is unreachable
+        self._degraded = False
+
+    def hit(self, key: str) -> int:
+        try:
+            n = int(self._incr(keys=[f"rl:{key}"], args=[self.window]))
+        except redis.exceptions.RedisError as e:
+            # keep limiting per process instead of turning every request into a 500
+            if not self._degraded:
+                logger.warning("Redis rate-limit counter unavailable (%s); using in-process counts", e)
+                self._degraded = True
+            return self._fallback.hit(key)
+        if self._degraded:
+            logger.info("Redis rate-limit counter reachable again")
+            self._degraded = False
+        return n
+
+if Config.RATE_LIMIT_REDIS_URL and redis is not None:
+    _rate_counter = _RedisWindowCounter(Config.RATE_LIMIT_REDIS_URL, Config.RATE_LIMIT_WINDOW)
+else:
+    if Config.RATE_LIMIT_REDIS_URL:
+        logger.warning("RATE_LIMIT_REDIS_URL set but redis is not installed; using in-process counters")
+    _rate_counter = _LocalWindowCounter(Config.RATE_LIMIT_WINDOW)
+REQUEST_COUNTS = getattr(_rate_counter, "counts", {})
 
 def rate_limit(limit: int = Config.RATE_LIMIT):
     def deco(f):
         @wraps(f)
         def wrapped(*a, **kw):
             # Skip rate limit in CI or test env
-            if os.getenv("DISABLE_RATE_LIMIT", "false").lower() == "true":
+            if Config.DISABLE_RATE_LIMIT:
                 return f(*a, **kw)
 
             ip = request.headers.get("X-Forwarded-For", request.remote_addr) or "unknown"
-            REQUEST_COUNTS[ip] = REQUEST_COUNTS.get(ip, 0) + 1
-            if REQUEST_COUNTS[ip] > limit:
-                HTTP_REQS.labels(method=request.method, status="429").inc()
-                return jsonify({"ok": False, "error": "rate limit exceeded"}), 429
+            if _rate_counter.hit(ip) > limit:
+                _count(request.method, "429")
+                return _json({"ok": False, "error": "rate limit exceeded"}, 429)
             return f(*a, **kw)
         return wrapped
     return deco
 
 
 # ────────────────────────── Routes ─────────────────────────────
+_ROOT_HTML = (
+    b"<h3>AI-DevOps Risk API</h3><ul>"
+    b"<li><code>/healthz</code></li>"
+    b"<li><code>/predict</code> (POST)</li>"
+    b"<li><code>/predict/sample</code></li>"
+    b"<li><code>/metrics</code></li></ul>"
+)
+_HTML_HEADERS = {"Content-Type": "text/html"}
+
 @app.get("/")
 def root():
-    HTTP_REQS.labels(method="GET", status="200").inc()
-    return (
-        "<h3>AI-DevOps Risk API</h3><ul>"
-        "<li><code>/healthz</code></li>"
-        "<li><code>/predict</code> (POST)</li>"
-        "<li><code>/predict/sample</code></li>"
-        "<li><code>/metrics</code></li></ul>", 200,
-        {"Content-Type": "text/html"},
-    )
+    _count("GET", "200")
+    return _ROOT_HTML, 200, _HTML_HEADERS
+
+@lru_cache(maxsize=1)
+def _sklearn_version() -> Optional[str]:
+    try:
+        import sklearn; return sklearn.__version__
+    except Exception: return None
 
 @app.get("/healthz")
 def healthz():
     _load_model_if_needed()
-    HTTP_REQS.labels(method="GET", status="200").inc()
-    try:
-        import sklearn; skl_ver = sklearn.__version__
-    except Exception: skl_ver = None
-    path = _resolve_model_path() or Config.MODEL_PATH
-    return jsonify({
+    _count("GET", "200")
+    path = _cached_model_path()
+    return _json({
         "ok": True,
-        "status": "ok" if (_model or _model_err) else "init",
+        "status": "ok" if (_model is not None or _model_err) else "init",
         "model_loaded": _model is not None,
         "model_error": _model_err,
-        "model_path": path,
-        "model_path_exists": Path(path).exists(),
-        "sklearn_version": skl_ver,
-    }), 200
+        "model_path": path or Config.MODEL_PATH,
+        "model_path_exists": path is not None,
+        "sklearn_version": _sklearn_version(),
+    })
 
 @app.get("/predict/sample")
 def sample():
-    HTTP_REQS.labels(method="GET", status="200").inc()
-    return jsonify({
+    _count("GET", "200")
+    return _json({
         "restart_count_last_5m": 0, "cpu_usage_pct": 10,
         "memory_usage_bytes": 50*1024*1024, "ready_replica_ratio": 1.0,
         "unavailable_replicas": 0, "network_receive_bytes_per_s": 0,
         "http_5xx_error_rate": 0.0,
-    }), 200
+    })
 
 @app.post("/predict")
 @rate_limit()
 def predict():
-    start = time.time()
+    start = time.perf_counter()
     try:
-        payload = request.get_json(force=True, silent=False) or {}
-    except Exception:
+        payload = _loads(request.get_data(cache=False)) or {}
+    except ValueError:              # orjson/json JSONDecodeError
         return _json_error("Invalid JSON", 400)
+    if not isinstance(payload, dict):
+        return _json_error("JSON body must be an object", 400)
 
     feats, err = _validate(payload)
     if err: return _json_error(err, 400)
 
     if random.random() < Config.FAILURE_PROB:
-        HTTP_REQS.labels(method="POST", status="500").inc()
+        _count("POST", "500")
         logger.error(json.dumps({"event": "inject_failure"}))
-        return jsonify({"ok": False, "error": "internal (injected)"}), 500
+        return _json({"ok": False, "error": "internal (injected)"}, 500)
 
     prob = _predict_probability(feats)
     FAILURE_PROB.set(prob)
@@ -213,18 +420,24 @@ def predict():
         "ok": True,
         "probability": prob,
         "risk": "HIGH" if prob >= Config.RISK_HIGH_THRESHOLD else "LOW",
-        "features": feats,
+        "features": features_to_dict(feats),
         "model_loaded": _model is not None,
         "model_error": _model_err,
     }
-    HTTP_REQS.labels(method="POST", status="200").inc()
-    PREDICT_DURATION.observe(time.time()-start)
-    REQ_LATENCY.labels(path="/predict").observe(time.time()-start)
-    return jsonify(resp), 200
-
-@app.get("/metrics")
-def metrics():
-    return generate_latest(), 200, {"Content-Type": CONTENT_TYPE_LATEST}
+    _count("POST", "200")
+    dur = time.perf_counter() - start
+    PREDICT_DURATION.observe(dur)
+    _PREDICT_LATENCY.observe(dur)
+    return _json(resp)
+
+# /metrics is served by prometheus_client's own WSGI app, outside Flask routing
+_prom_wsgi = make_wsgi_app()
+
+def _metrics_wsgi(environ, start_response):
+    _flush_pending()
+    return _prom_wsgi(environ, start_response)
+
+app.wsgi_app = DispatcherMiddleware(app.wsgi_app, {"/metrics": _metrics_wsgi})
 
 # ───────────────────────── Entrypoint ──────────────────────────
 if __name__ == "__main__":
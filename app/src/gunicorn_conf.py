@@ -0,0 +1,28 @@
+# Gunicorn settings for the risk API (gunicorn -c gunicorn_conf.py app:app)
+#
+# The API is mostly request parsing, JSON and metrics around a tiny model, so
+# gevent workers let one process overlap many connections. Patch the stdlib
+# here, before preload_app imports Flask/app.py in the master. sklearn/NumPy
+# scoring runs in C without yielding, which is fine for 7-feature predictions.
+import os
+
+from gevent import monkey
+
+monkey.patch_all()
+
+bind               = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class       = "gevent"
+workers            = int(os.getenv("GUNICORN_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+preload_app        = True     # import app.py + load the model once in the master, then fork
+timeout            = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout   = 30
+keepalive          = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+loglevel           = os.getenv("LOG_LEVEL", "info").lower()
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded import and before workers fork,
+    # so every worker shares the model's pages copy-on-write.
+    import app
+    app._load_model_if_needed()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Export a trained *linear* failure-risk model (model.pkl from train_model.py)
+to a flat safetensors file that the API can score with plain NumPy.
+
+Supported shape (what train_model.py produces for --model logreg):
+
+  [CalibratedClassifierCV(isotonic|sigmoid)] -> [FrozenEstimator] -> Pipeline(prep, clf)
+      prep = ColumnTransformer of [SimpleImputer] -> [log1p] -> [Robust|StandardScaler]
+      clf  = binary LogisticRegression
+
+Tensors are stacked per calibrated fold (k = 1 when uncalibrated), in feature order:
+
+  impute (k, F)   center (k, F)   scale (k, F)   log1p (F,) uint8
+  coef   (k, F)   intercept (k,)
+  (--quantize int8: coef_i8 (k, F) int8 + coef_scale (k,) replace coef)
+  isotonic:  iso_x_<i>, iso_y_<i>  (thresholds of fold i; iso_x in the fitted dtype)
+  sigmoid:   sig_a (k,), sig_b (k,)
+
+LinearScorer reads that file back and scores it with NumPy alone; the API
+(app/src/app.py) and predict_failure.py both serve linear models through it.
+
+Usage:
+  python ml_model/convert_to_safetensors.py ml_model/models/model.pkl
+  # -> ml_model/models/model.safetensors
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+from safetensors import safe_open
+from safetensors.numpy import load_file, save_file
+
+# sklearn (and joblib) are imported inside the export functions only, so that
+# importing LinearScorer for serving stays NumPy + safetensors.
+
+DEFAULT_FEATURES = [
+    "restart_count_last_5m",
+    "cpu_usage_pct",
+    "memory_usage_bytes",
+    "ready_replica_ratio",
+    "unavailable_replicas",
+    "network_receive_bytes_per_s",
+    "http_5xx_error_rate",
+]
+
+
+class UnsupportedModel(ValueError):
+    pass
+
+
+# --------------------------- extraction ------------------------------ #
+
+def _feature_names(model) -> List[str]:
+    names = getattr(model, "feature_names_in_", None)
+    return [str(n) for n in names] if names is not None else list(DEFAULT_FEATURES)
+
+
+def _column_index(col, features: List[str]) -> int:
+    return features.index(col) if isinstance(col, str) else int(col)
+
+
+def _unfrozen(est):
+    # calibrated on a holdout via FrozenEstimator(pipe) (train_model.py, sklearn >= 1.6)
+    return est.estimator if type(est).__name__ == "FrozenEstimator" else est
+
+
+def _steps(trans) -> list:
+    from sklearn.pipeline import Pipeline
+
+    return [s for _, s in trans.steps] if isinstance(trans, Pipeline) else [trans]
+
+
+def _export_pipeline(pipe, features: List[str]) -> Dict[str, np.ndarray]:
+    """Per-feature impute/log1p/affine stats + LR weights, in `features` order."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import FunctionTransformer, RobustScaler, StandardScaler
+
+    if not isinstance(pipe, Pipeline) or not isinstance(pipe.steps[-1][1], LogisticRegression):
+        raise UnsupportedModel("expected Pipeline(..., LogisticRegression)")
+    prep, clf = pipe.steps[0][1], pipe.steps[-1][1]
+    if not isinstance(prep, ColumnTransformer):
+        raise UnsupportedModel("expected a ColumnTransformer as first step")
+    if clf.coef_.shape[0] != 1:
+        raise UnsupportedModel("only binary LogisticRegression is supported")
+
+    n = len(features)
+    impute = np.zeros(n)
+    center = np.zeros(n)
+    scale = np.ones(n)
+    log1p = np.zeros(n, dtype=np.uint8)
+    coef = np.zeros(n)
+
+    out_pos = 0                      # ColumnTransformer output = concat of its blocks
+    for _, trans, cols in prep.transformers_:
+        if trans == "drop":
+            continue
+        idx = [_column_index(c, features) for c in cols]
+        steps = [] if trans == "passthrough" else _steps(trans)
+        stage = 0                    # enforce impute -> log1p -> scaler order
+        for step in steps:
+            if isinstance(step, SimpleImputer) and stage == 0:
+                impute[idx] = step.statistics_
+                stage = 1
+            elif isinstance(step, FunctionTransformer) and step.func is np.log1p and stage <= 1:
+                log1p[idx] = 1
+                stage = 2
+            elif isinstance(step, RobustScaler) and stage <= 2:
+                center[idx] = step.center_ if step.center_ is not None else 0.0
+                scale[idx] = step.scale_ if step.scale_ is not None else 1.0
+                stage = 3
+            elif isinstance(step, StandardScaler) and stage <= 2:
+                center[idx] = step.mean_ if step.mean_ is not None else 0.0
+                scale[idx] = step.scale_ if step.scale_ is not None else 1.0
+                stage = 3
+            else:
+                raise UnsupportedModel(f"unsupported preprocessing step: {step!r}")
+        coef[idx] = clf.coef_[0, out_pos:out_pos + len(idx)]
+        out_pos += len(idx)
+
+    if out_pos != clf.coef_.shape[1]:
+        raise UnsupportedModel("ColumnTransformer output does not match coef_ width")
+    return {
+        "impute": impute, "center": center, "scale": scale, "log1p": log1p,
+        "coef": coef, "intercept": np.float64(clf.intercept_[0]),
+    }
+
+
+def export_tensors(model) -> Tuple[Dict[str, np.ndarray], Dict[str, str]]:
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.isotonic import IsotonicRegression
+
+    features = _feature_names(model)
+    if isinstance(model, CalibratedClassifierCV):
+        folds = model.calibrated_classifiers_
+        pipes = [_unfrozen(cc.estimator) for cc in folds]
+        calibrators = [cc.calibrators[0] for cc in folds]
+        method = "isotonic" if isinstance(calibrators[0], IsotonicRegression) else "sigmoid"
+    else:
+        pipes, calibrators, method = [model], [], "none"
+
+    parts = [_export_pipeline(p, features) for p in pipes]
+    tensors: Dict[str, np.ndarray] = {
+        key: np.ascontiguousarray(np.stack([p[key] for p in parts]), dtype=np.float64)
+        for key in ("impute", "center", "scale", "coef", "intercept")
+    }
+    tensors["log1p"] = parts[0]["log1p"]
+    if any((p["log1p"] != tensors["log1p"]).any() for p in parts):
+        raise UnsupportedModel("folds disagree on log1p columns")
+
+    if method == "isotonic":
+        for i, cal in enumerate(calibrators):
+            # keep the fitted dtype: IsotonicRegression casts inputs to it before interpolating
+            tensors[f"iso_x_{i}"] = np.asarray(cal.X_thresholds_)
+            tensors[f"iso_y_{i}"] = np.asarray(cal.y_thresholds_, dtype=np.float64)
+    elif method == "sigmoid":
+        tensors["sig_a"] = np.array([c.a_ for c in calibrators], dtype=np.float64)
+        tensors["sig_b"] = np.array([c.b_ for c in calibrators], dtype=np.float64)
+
+    metadata = {"features": json.dumps(features), "calibration": method}
+    return tensors, metadata
+
+
+def quantize_int8(tensors: Dict[str, np.ndarray]) -> float:
+    """Symmetric per-fold int8 weights: coef ~= coef_i8 * coef_scale. Returns max abs error."""
+    coef = tensors.pop("coef")
+    scale = np.abs(coef).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    coef_i8 = np.round(coef / scale[:, None]).astype(np.int8)
+    tensors["coef_i8"] = coef_i8
+    tensors["coef_scale"] = scale
+    return float(np.abs(coef - coef_i8 * scale[:, None]).max())
+
+
+# ------------------------------ scoring ------------------------------ #
+
+class LinearScorer:
+    """
+    NumPy scorer for a file written by this module: impute -> log1p -> scale -> LR
+    -> calibration, averaged over the calibrated folds. No pickle, no sklearn.
+    """
+
+    def __init__(self, path):
+        with safe_open(str(path), framework="np") as fh:
+            meta = fh.metadata() or {}
+        t = load_file(str(path))
+        self.features = json.loads(meta.get("features", "null")) or list(DEFAULT_FEATURES)
+        self.calibration = meta.get("calibration", "none")
+        self.impute, self.center, self.scale = t["impute"], t["center"], t["scale"]  # (k, F)
+        self.intercept = t["intercept"]                                               # (k,)
+        if "coef_i8" in t:       # --quantize int8
+            self.coef = t["coef_i8"] * t["coef_scale"][:, None]
+        else:
+            self.coef = t["coef"]
+        self.log1p = t["log1p"].astype(bool)
+        if self.calibration == "isotonic":
+            self.iso = [(t[f"iso_x_{i}"], t[f"iso_y_{i}"]) for i in range(len(self.coef))]
+        elif self.calibration == "sigmoid":
+            self.sig_a, self.sig_b = t["sig_a"][:, None], t["sig_b"][:, None]
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        Xk = np.where(np.isnan(X)[None], self.impute[:, None, :], X[None])            # (k, n, F)
+        Xk[..., self.log1p] = np.log1p(Xk[..., self.log1p])
+        z = np.einsum("knf,kf->kn", (Xk - self.center[:, None, :]) / self.scale[:, None, :], self.coef)
+        z += self.intercept[:, None]
+        if self.calibration == "isotonic":
+            p = np.stack([np.interp(z[i].astype(x.dtype), x, y) for i, (x, y) in enumerate(self.iso)])
+        elif self.calibration == "sigmoid":
+            p = np.exp(-np.logaddexp(0.0, self.sig_a * z + self.sig_b))   # overflow-free sigmoid
+        else:
+            p = np.exp(-np.logaddexp(0.0, -z))
+        p1 = p.mean(axis=0)
+        return np.column_stack((1.0 - p1, p1))
+
+
+# ------------------------------ CLI ---------------------------------- #
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Export a linear model.pkl to model.safetensors for NumPy-only scoring."
+    )
+    p.add_argument("model", nargs="?", default="ml_model/models/model.pkl",
+                   help="Path to the joblib model produced by train_model.py.")
+    p.add_argument("--out", default=None,
+                   help="Output path (default: <model>.safetensors next to the model).")
+    p.add_argument("--quantize", choices=["none", "int8"], default="none",
+                   help="Store LR weights as int8 with a per-fold scale.")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    src = Path(args.model)
+    out = Path(args.out) if args.out else src.with_suffix(".safetensors")
+
+    import joblib
+
+    model = joblib.load(src)
+    try:
+        tensors, metadata = export_tensors(model)
+    except UnsupportedModel as e:
+        print(f"Cannot export {src}: {e}", file=sys.stderr)
+        return 1
+
+    if args.quantize == "int8":
+        err = quantize_int8(tensors)
+        print(f"Quantized coef to int8 (max abs weight error {err:.3g})")
+
+    save_file(tensors, str(out), metadata=metadata)
+    print(f"Saved {len(tensors)} tensors ({metadata['calibration']} calibration) to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
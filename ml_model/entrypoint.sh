@@ -4,5 +4,9 @@ if [ "$1" = "serve" ]; then
   shift            # 'serve' hata do
 fi
 
-# gunicorn launch
-exec gunicorn -b 0.0.0.0:8080 inference_server:app
+# gunicorn launch: gevent workers, 2*CPU+1 unless GUNICORN_WORKERS is set.
+# --preload imports inference_server (and loads model.pkl) once in the master;
+# workers fork from it and share the model pages copy-on-write.
+WORKERS="${GUNICORN_WORKERS:-$((2 * $(nproc) + 1))}"
+exec gunicorn -k gevent -w "$WORKERS" --worker-connections 1000 --preload \
+  -b 0.0.0.0:8080 inference_server:app
@@ -1,6 +1,6 @@
 ﻿import joblib, flask, numpy as np
 app = flask.Flask(__name__)
-model = joblib.load("model.pkl")
+model = joblib.load("model.pkl", mmap_mode="r")   # arrays mmap'd; shared by --preload workers
 
 # ---- SageMaker health check ----
 @app.route("/ping", methods=["GET"])
@@ -10,8 +10,8 @@ def ping():
 # ---- SageMaker default invoke ----
 @app.route("/invocations", methods=["POST"])
 def invoke():
-    data = np.array(flask.request.json["features"])
-    preds = model.predict([data]).tolist()
+    data = np.asarray(flask.request.json["features"], dtype=np.float32).reshape(1, -1)
+    preds = model.predict(data).tolist()
     return {"prediction": preds}
 
 # (optional) पुराना predict path
@@ -12,19 +12,35 @@ Usage examples:
   # CI mode – only probability
   python ml_model/predict_failure.py --plain \
       --input-json '{"restart_count_last_5m":1,"cpu_usage_pct":20,"memory_usage_bytes":200000000,"ready_replica_ratio":1.0,"unavailable_replicas":0,"network_receive_bytes_per_s":0,"http_5xx_error_rate":0.0}'
+
+  # long-lived mode – model loaded once; one JSON object per stdin line,
+  # one probability per stdout line ("nan" for unparseable lines)
+  cat samples.jsonl | python ml_model/predict_failure.py --serve
+
+  # ask a warm predict_serve.py daemon instead of loading the model here
+  python ml_model/predict_failure.py --plain --socket /tmp/predict.sock --input-json '{...}'
 """
 
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import logging
+import operator
 import os
+import socket
 import sys
 from pathlib import Path
 from typing import Tuple
 
 import joblib
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
 
 # --- constants ------------------------------------------------------ #
 DEFAULT_FEATURES = [
@@ -37,6 +53,8 @@ DEFAULT_FEATURES = [
     "http_5xx_error_rate",          # application error surface
 ]
 MODEL_PATH = Path(__file__).parent / "models" / "model.pkl"
+ONNX_PATH = MODEL_PATH.with_suffix(".onnx")           # written by train_model.py --onnx
+TENSORS_PATH = MODEL_PATH.with_suffix(".safetensors")  # linear models only, see train_model.py
 HIGH_RISK_DEFAULT_THRESHOLD = 0.6
 
 # --- logging -------------------------------------------------------- #
@@ -47,12 +65,111 @@ logging.basicConfig(
 )
 logger = logging.getLogger("predict_failure")
 
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps_sorted(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode()
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"))
+
 # --- model loading & fallback -------------------------------------- #
 
-def load_model() -> Tuple[object | None, list[str]]:
+class _OnnxModel:
+    """predict_proba over an onnxruntime session exported by train_model.py --onnx."""
+
+    def __init__(self, path: Path):
+        import onnxruntime as ort
+
+        self.sess = ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+        meta = self.sess.get_modelmeta().custom_metadata_map
+        self.features = json.loads(meta["features"]) if "features" in meta else DEFAULT_FEATURES
+
+    def predict_proba(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.sess.run(["probabilities"], {"input": X})[0]
+
+
+def _load_export(factory, path: Path, runtime: str) -> Tuple[object | None, list[str]]:
+    try:
+        model = factory(path)
+    except ImportError:
+        logger.info(f"{runtime} not installed; ignoring {path}")
+        return None, DEFAULT_FEATURES
+    except Exception as e:
+        logger.warning(f"Failed to load {path.name} ({e}); trying the next format.")
+        return None, DEFAULT_FEATURES
+    logger.info(f"Loaded model from {path}, using features: {model.features}")
+    return model, model.features
+
+
+def _tensor_model(path: Path):
+    # shared with the API; imported lazily so a missing safetensors is just "not installed"
+    from convert_to_safetensors import LinearScorer
+
+    return LinearScorer(path)
+
+
+class _SigmoidHead:
+    """
+    predict_proba for an uncalibrated binary Pipeline([prep,] clf) whose probability
+    is exactly sigmoid(decision_function): transform once, score the raw margin,
+    and skip predict_proba's two-column softmax/normalisation bookkeeping.
+    """
+
+    def __init__(self, prep, clf):
+        from scipy.special import expit   # overflow-safe sigmoid; scipy comes with sklearn
+
+        self.prep = prep
+        self.clf = clf
+        self._expit = expit
+
+    def predict_proba(self, X):
+        if self.prep is not None:
+            X = self.prep.transform(X)
+        margin = self.clf.decision_function(X)
+        p = self._expit(margin)
+        return np.column_stack((1.0 - p, p))
+
+
+def _decision_head(model) -> _SigmoidHead | None:
+    # Calibrated models (CalibratedClassifierCV) remap the margin, so they keep
+    # predict_proba; only plain LR / log-loss GBDT pipelines qualify. sklearn is
+    # already imported by unpickling the model, so these imports are free here.
+    from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    if not isinstance(model, Pipeline) or len(model.steps) > 2:
+        return None
+    prep = model.steps[0][1] if len(model.steps) == 2 else None
+    clf = model.steps[-1][1]
+    if len(getattr(clf, "classes_", ())) != 2:
+        return None
+    if isinstance(clf, LogisticRegression) or (
+        isinstance(clf, (GradientBoostingClassifier, HistGradientBoostingClassifier))
+        and clf.loss == "log_loss"
+    ):
+        return _SigmoidHead(prep, clf)
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def load_model(mmap: bool = True) -> Tuple[object | None, list[str]]:
+    """Load once per process (the daemon and --serve call this repeatedly for free)."""
+    # Sidecar exports first: neither needs sklearn imported or a pickle trusted
+    for factory, path, runtime in ((_OnnxModel, ONNX_PATH, "onnxruntime"),
+                                   (_tensor_model, TENSORS_PATH, "safetensors")):
+        if path.exists():
+            model, features = _load_export(factory, path, runtime)
+            if model is not None:
+                return model, features
     if MODEL_PATH.exists():
         try:
-            blob = joblib.load(MODEL_PATH)
+            # mmap: ndarrays are page-cache mapped rather than copied; only possible
+            # for uncompressed dumps (train_model.py --compress 0, the default)
+            blob = joblib.load(MODEL_PATH, mmap_mode="r" if mmap else None)
             model = blob.get("model") if isinstance(blob, dict) else blob
             features = (
                 blob.get("metadata", {}).get("features")
@@ -64,7 +181,7 @@ def load_model() -> Tuple[object | None, list[str]]:
             if not features:
                 features = DEFAULT_FEATURES
             logger.info(f"Loaded model from {MODEL_PATH}, using features: {features}")
-            return model, features
+            return _decision_head(model) or model, features
         except Exception as e:
             logger.warning(f"Failed to load trained model ({e}); using heuristic fallback.")
     else:
@@ -72,53 +189,122 @@ def load_model() -> Tuple[object | None, list[str]]:
     return None, DEFAULT_FEATURES
 
 
-def heuristic_failure_probability(x: dict) -> float:
+# Heuristic terms, in DEFAULT_FEATURES order: each input is scaled by its
+# baseline, clamped, then weighted. Readiness enters as 0.35 * (1 - ratio).
+_HEURISTIC_SCALE = 1.0 / np.array(
+    [5, 100, 512 * 1024 * 1024, 1, 10, 1_000_000, 5], dtype=np.float64
+)  # restarts, CPU %, 512Mi, ratio, replicas, 1MB/s, 5xx rate
+_HEURISTIC_LO = np.array([-np.inf, 0, -np.inf, -np.inf, -np.inf, -np.inf, -np.inf])
+_HEURISTIC_HI = np.array([1, 1, 1, np.inf, 1, 1, 1], dtype=np.float64)
+_HEURISTIC_WEIGHTS = np.array([0.20, 0.10, 0.05, -0.35, 0.10, 0.05, 0.15])
+_HEURISTIC_BIAS = 0.35
+# Heuristic only: missing readiness means "fully ready", everything else defaults
+# to 0. The model row keeps 0.0 for every missing feature.
+_FEATURE_DEFAULTS = {"ready_replica_ratio": 1.0}
+
+
+def heuristic_failure_probability(row: np.ndarray) -> float:
     """
     Conservative heuristic combining key risk signals to approximate failure probability.
-    Weights can be tuned over time based on historical performance.
+    `row` holds the DEFAULT_FEATURES values in order. Readiness drop and restarts
+    carry the most weight; weights can be tuned over time based on historical performance.
     """
-    # Normalize / clamp inputs
-    cpu = min(max(x.get("cpu_usage_pct", 0) / 100.0, 0.0), 1.0)
-    mem = min(x.get("memory_usage_bytes", 0) / (512 * 1024 * 1024), 1.0)  # baseline 512Mi
-    net = min(x.get("network_receive_bytes_per_s", 0) / 1_000_000, 1.0)   # baseline 1MB/s
-    rdy = x.get("ready_replica_ratio", 1.0)
-    unavail = min(x.get("unavailable_replicas", 0), 10) / 10.0
-    restarts = min(x.get("restart_count_last_5m", 0), 5) / 5.0
-    http5 = min(x.get("http_5xx_error_rate", 0), 5) / 5.0
-
-    # Weighted sum: readiness drop and restarts are strongest indicators
-    score = 0.0
-    score += 0.35 * (1 - rdy)          # readiness gaps
-    score += 0.20 * restarts           # recent restarts
-    score += 0.15 * http5              # application errors
-    score += 0.10 * unavail            # unavailable replicas
-    score += 0.10 * cpu                # CPU pressure
-    score += 0.05 * mem                # Memory pressure
-    score += 0.05 * net                # Network receive
-
+    terms = np.clip(row * _HEURISTIC_SCALE, _HEURISTIC_LO, _HEURISTIC_HI)
+    score = _HEURISTIC_BIAS + float(_HEURISTIC_WEIGHTS @ terms)
     return max(0.0, min(score, 1.0))
 
 
-def predict_from_dict(sample: dict, model_obj, feature_order: list[str]) -> float:
-    # Build feature vector in expected order
-    row = []
-    for feat in feature_order:
-        raw = sample.get(feat, 0.0)
-        try:
-            row.append(float(raw))
-        except Exception:
-            logger.warning(f"Feature {feat} has non-numeric value {raw}, coercing to 0.")
-            row.append(0.0)
+def _feature_value(sample: dict, feat: str, defaults: dict) -> float:
+    raw = sample.get(feat, defaults[feat])
+    try:
+        return float(raw)
+    except Exception:
+        logger.warning(f"Feature {feat} has non-numeric value {raw}, coercing to 0.")
+        return 0.0
 
+
+def _row_getter(feature_order) -> tuple:
+    """(itemgetter over `feature_order`, 0.0 defaults for missing keys, width)."""
+    key = tuple(feature_order)
+    getter = operator.itemgetter(*key) if len(key) > 1 else (lambda d: (d[key[0]],))
+    return getter, dict.fromkeys(key, 0.0), len(key)
+
+
+_DEFAULT_ROW_GETTER = _row_getter(DEFAULT_FEATURES)
+_HEURISTIC_ROW_GETTER = (_DEFAULT_ROW_GETTER[0],
+                         {**_DEFAULT_ROW_GETTER[1], **_FEATURE_DEFAULTS},
+                         _DEFAULT_ROW_GETTER[2])
+_ROW_GETTERS: dict[tuple, tuple] = {}   # other orders, e.g. from model metadata
+
+
+def _feature_row(sample: dict, feature_order: list[str], heuristic: bool = False) -> np.ndarray:
+    """
+    float64 row in `feature_order`; per-feature coercion only if the fast path fails.
+    heuristic=True (DEFAULT_FEATURES order only) applies _FEATURE_DEFAULTS to missing keys.
+    """
+    if heuristic:
+        getter, defaults, n = _HEURISTIC_ROW_GETTER
+    elif feature_order is DEFAULT_FEATURES:
+        getter, defaults, n = _DEFAULT_ROW_GETTER
+    else:
+        key = tuple(feature_order)
+        entry = _ROW_GETTERS.get(key)
+        if entry is None:
+            entry = _ROW_GETTERS[key] = _row_getter(key)
+        getter, defaults, n = entry
+    try:
+        return np.fromiter(map(float, getter({**defaults, **sample})), dtype=np.float64, count=n)
+    except (TypeError, ValueError):   # e.g. None or "n/a": coerce per feature, with warnings
+        return np.fromiter(
+            (_feature_value(sample, f, defaults) for f in defaults),
+            dtype=np.float64, count=n,
+        )
+
+
+def predict_from_dict(sample: dict, model_obj, feature_order: list[str]) -> float:
     if model_obj is not None:
+        # Build the feature row once, in the model's expected order
+        row = _feature_row(sample, feature_order)
         try:
             # Most classifiers used (e.g., GradientBoostingClassifier) have predict_proba
-            prob = float(model_obj.predict_proba([row])[0][1])
+            prob = float(model_obj.predict_proba(row.reshape(1, -1))[0, 1])
             return max(0.0, min(prob, 1.0))
         except Exception as e:
             logger.warning(f"Model inference failed ({e}); falling back to heuristic.")
-    # fallback
-    return heuristic_failure_probability(sample)
+    # fallback: default order, missing readiness counts as fully ready
+    return heuristic_failure_probability(_feature_row(sample, DEFAULT_FEATURES, heuristic=True))
+
+
+def predict_failure_batch(X: np.ndarray, model: Tuple[object | None, list[str]] | None = None) -> np.ndarray:
+    """
+    Failure probabilities for an (n, F) array of rows in DEFAULT_FEATURES order,
+    scored in one predict_proba call (heuristic if there is no model). Computed in
+    float64 like predict_from_dict; only the returned array is float32.
+    `model` is a load_model() result; defaults to the process-wide cached one.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    model_obj, feature_order = model if model is not None else load_model()
+    if model_obj is not None:
+        try:
+            if feature_order != DEFAULT_FEATURES:
+                X_model = X[:, [DEFAULT_FEATURES.index(f) for f in feature_order]]
+            else:
+                X_model = X
+            prob = model_obj.predict_proba(X_model)[:, 1]
+            return np.clip(prob, 0.0, 1.0).astype(np.float32, copy=False)
+        except Exception as e:
+            logger.warning(f"Model inference failed ({e}); falling back to heuristic.")
+    terms = np.clip(X * _HEURISTIC_SCALE, _HEURISTIC_LO, _HEURISTIC_HI)
+    return np.clip(_HEURISTIC_BIAS + terms @ _HEURISTIC_WEIGHTS, 0.0, 1.0).astype(np.float32)
+
+
+def predict_failure(metrics: dict, model: Tuple[object | None, list[str]] | None = None) -> float:
+    """
+    Probability for one metrics dict, identical to the CLI's (no float32 rounding);
+    missing features take their defaults. Use predict_failure_batch for many rows.
+    """
+    model_obj, feature_order = model if model is not None else load_model()
+    return predict_from_dict(metrics, model_obj, feature_order)
 
 
 # --- CLI ------------------------------------------------------------ #
@@ -139,6 +325,21 @@ def build_arg_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Print only raw probability (for CI output).",
     )
+    p.add_argument(
+        "--serve",
+        action="store_true",
+        help="Load the model once, then score JSON lines from stdin (one probability per line).",
+    )
+    p.add_argument(
+        "--socket",
+        help="Score via a running predict_serve.py on this Unix socket; "
+             "falls back to loading the model here if it is unreachable.",
+    )
+    p.add_argument(
+        "--no-mmap",
+        action="store_true",
+        help="Read model.pkl fully into memory instead of memory-mapping its arrays.",
+    )
     p.add_argument(
         "--threshold",
         type=float,
@@ -164,18 +365,55 @@ def load_input(raw: str | None) -> dict:
     if raw.startswith("@"):
         path = raw[1:]
         try:
-            with open(path, "r") as f:
-                return json.load(f)
+            with open(path, "rb") as f:
+                return _loads(f.read())
         except Exception as e:
             logger.error(f"Failed to read JSON from file {path}: {e}")
             sys.exit(2)
     try:
-        return json.loads(raw)
+        return _loads(raw)
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON provided: {e}")
         sys.exit(2)
 
 
+def serve(model_obj, feature_order: list[str], stream_in=None, stream_out=None) -> int:
+    """Score newline-delimited JSON samples until EOF, reusing the loaded model."""
+    stream_in = stream_in or sys.stdin
+    stream_out = stream_out or sys.stdout
+    for line in stream_in:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            sample = _loads(line)
+        except json.JSONDecodeError as e:
+            sample, err = None, str(e)
+        else:
+            err = None if isinstance(sample, dict) else "expected a JSON object"
+        if err:
+            logger.error(f"Skipping invalid input line: {err}")
+            stream_out.write("nan\n")
+        else:
+            prob = predict_from_dict(sample, model_obj, feature_order)
+            # full precision (repr round-trips), so --socket callers get the same
+            # fail_prob as scoring locally
+            stream_out.write(f"{prob!r}\n")
+        stream_out.flush()
+    return 0
+
+
+def predict_via_socket(sample: dict, path: str, timeout: float = 5.0) -> float:
+    """One request/response round trip to predict_serve.py."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(timeout)
+        conn.connect(path)
+        conn.sendall(_dumps_sorted(sample).encode() + b"\n")
+        conn.shutdown(socket.SHUT_WR)
+        with conn.makefile("rb") as reply:
+            return float(reply.readline())
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = build_arg_parser()
     args = parser.parse_args(argv)
@@ -186,12 +424,28 @@ def main(argv: list[str] | None = None) -> int:
     # happens **before** model loading so "Loaded model ..." message
     # doesn’t pollute the output.
     # -----------------------------------------------------------------
-    if args.plain:
+    if args.plain or args.serve:
         logging.getLogger("predict_failure").setLevel(logging.WARNING)
 
+    if args.serve:
+        # stdout carries only probabilities; send diagnostics to stderr
+        for h in logging.getLogger().handlers:
+            if isinstance(h, logging.StreamHandler):
+                h.setStream(sys.stderr)
+        model_obj, feature_order = load_model(mmap=not args.no_mmap)
+        return serve(model_obj, feature_order)
+
     sample = load_input(args.input_json)
-    model_obj, feature_order = load_model()
-    prob = predict_from_dict(sample, model_obj, feature_order)
+    prob, inference = None, ""
+    if args.socket:
+        try:
+            prob, inference = predict_via_socket(sample, args.socket), f"via {args.socket}"
+        except (OSError, ValueError) as e:
+            logger.warning(f"Prediction daemon at {args.socket} unavailable ({e}); scoring locally.")
+    if prob is None:
+        model_obj, feature_order = load_model(mmap=not args.no_mmap)
+        prob = predict_from_dict(sample, model_obj, feature_order)
+        inference = "yes" if model_obj is not None else "no (heuristic)"
     highrisk = prob > args.threshold
 
     if args.plain:
@@ -202,8 +456,8 @@ def main(argv: list[str] | None = None) -> int:
         print(f"Predicted Risk           : {status}")
         print(f"Failure Probability      : {prob:.2%}")
         print(f"Threshold (high risk)    : {args.threshold:.2f}")
-        print(f"Used model inference     : {'yes' if model_obj is not None else 'no (heuristic)'}")
-        print(f"Input features           : {json.dumps(sample, sort_keys=True)}")
+        print(f"Used model inference     : {inference}")
+        print(f"Input features           : {_dumps_sorted(sample)}")
 
     # Also set GitHub Actions output if applicable
     if "GITHUB_OUTPUT" in os.environ:
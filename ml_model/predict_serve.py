@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Warm scoring daemon for predict_failure.py: load the model once, then answer
+newline-delimited JSON samples over a Unix domain socket (one probability per
+line, "nan" for unparseable lines), so each CI prediction skips interpreter
+start-up and model loading.
+
+Usage examples:
+
+  # start once per job/runner
+  python ml_model/predict_serve.py --socket /tmp/predict.sock &
+
+  # score through the CLI (same output/GITHUB_OUTPUT handling as before)
+  python ml_model/predict_failure.py --plain --socket /tmp/predict.sock \
+      --input-json '{"restart_count_last_5m":1,"cpu_usage_pct":20}'
+
+  # or with no Python on the client side at all
+  echo '{"restart_count_last_5m":1,"cpu_usage_pct":20}' | socat - UNIX-CONNECT:/tmp/predict.sock
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import signal
+import socketserver
+import sys
+
+from predict_failure import load_model, logger, serve
+
+DEFAULT_SOCKET = "/tmp/predict.sock"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        # Reuse the --serve loop: a connection is just another line stream
+        stream_in = io.TextIOWrapper(self.rfile, encoding="utf-8")
+        stream_out = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        try:
+            serve(self.server.model_obj, self.server.feature_order, stream_in, stream_out)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away mid-reply
+        finally:
+            stream_in.detach()
+            stream_out.detach()
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        self.model_obj, self.feature_order = load_model()
+        super().__init__(path, _Handler)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Serve failure-probability predictions over a Unix domain socket."
+    )
+    p.add_argument("--socket", default=os.getenv("PREDICT_SOCKET", DEFAULT_SOCKET),
+                   help=f"Socket path to listen on (default {DEFAULT_SOCKET}, env PREDICT_SOCKET).")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)  # stale socket from a previous run
+
+    old_umask = os.umask(0o177)  # socket is private to the runner user
+    try:
+        server = _Server(args.socket)
+    finally:
+        os.umask(old_umask)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    logger.warning(f"Serving predictions on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
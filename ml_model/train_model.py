@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import argparse
+import copy
+import importlib.util
 import json
+import os
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
 import joblib
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.linear_model import LogisticRegression
@@ -17,21 +22,18 @@ from sklearn.metrics import (
 from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import RobustScaler, StandardScaler, FunctionTransformer
-from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier
 from sklearn.calibration import CalibratedClassifierCV
+from sklearn.isotonic import IsotonicRegression
+from safetensors.numpy import save_file
+
+from convert_to_safetensors import DEFAULT_FEATURES, _unfrozen, export_tensors
 
 
 # ----------------------------- Config -------------------------------- #
 
-CANONICAL_FEATURES = [
-    "restart_count_last_5m",
-    "cpu_usage_pct",
-    "memory_usage_bytes",
-    "ready_replica_ratio",
-    "unavailable_replicas",
-    "network_receive_bytes_per_s",
-    "http_5xx_error_rate",
-]
+# Same order the exporters and predict_failure.py use
+CANONICAL_FEATURES = DEFAULT_FEATURES
 
 # Aliases you might have in CSV; normalized below
 ALIASES = {
@@ -47,9 +49,18 @@ ALIASES = {
 }
 
 DEFAULT_TARGETS = ["is_failure", "failure", "label", "y"]  # first that exists is used
+POSITIVE_LABELS = ["1", "true", "yes", "fail"]              # string targets; others are 0
+
+# Per-feature clip bounds, in CANONICAL_FEATURES order (CPU is a percentage)
+FEATURE_LOWER = np.zeros(len(CANONICAL_FEATURES), dtype=np.float32)
+FEATURE_UPPER = np.array([np.inf, 100, np.inf, 1, np.inf, np.inf, np.inf], dtype=np.float32)
 
 HEAVY_TAIL = ["restart_count_last_5m", "memory_usage_bytes", "network_receive_bytes_per_s"]
 REST = ["cpu_usage_pct", "ready_replica_ratio", "unavailable_replicas", "http_5xx_error_rate"]
+# Models are fit on plain arrays in CANONICAL_FEATURES order, so column
+# selection is positional and inference never needs a DataFrame.
+HEAVY_TAIL_IDX = [CANONICAL_FEATURES.index(c) for c in HEAVY_TAIL]
+REST_IDX = [CANONICAL_FEATURES.index(c) for c in REST]
 
 
 # ------------------------- Utility functions ------------------------- #
@@ -57,17 +68,41 @@ REST = ["cpu_usage_pct", "ready_replica_ratio", "unavailable_replicas", "http_5x
 def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     # strip spaces and unify case
     df.columns = df.columns.str.strip()
-    # apply aliases
-    rename_map = {c: ALIASES.get(c, c) for c in df.columns}
-    df = df.rename(columns=rename_map)
+    # apply aliases (only the ones actually present)
+    rename_map = {c: ALIASES[c] for c in ALIASES.keys() & set(df.columns)}
+    if rename_map:
+        df = df.rename(columns=rename_map)
     # if cpu is 0..1, convert to percent
     if "cpu_usage_pct" in df.columns:
-        cpu = pd.to_numeric(df["cpu_usage_pct"], errors="coerce")
-        if cpu.max(skipna=True) is not None and cpu.max(skipna=True) <= 1.0:
+        cpu = pd.to_numeric(df["cpu_usage_pct"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        cpu_max = np.fmax.reduce(cpu, initial=-np.inf)   # NaN-skipping max, -inf if no values
+        if np.isfinite(cpu_max) and cpu_max <= 1.0:
             df["cpu_usage_pct"] = cpu * 100.0
     return df
 
 
+def _read_table(path: str, target: Optional[str] = None) -> pd.DataFrame:
+    # Parquet keeps dtypes and skips CSV text parsing; needs pyarrow (or fastparquet)
+    if Path(path).suffix.lower() in (".parquet", ".pq"):
+        return pd.read_parquet(path)
+
+    # Only parse the columns we use (features + candidate targets, by raw or
+    # alias name) and parse features straight to float32
+    wanted = set(CANONICAL_FEATURES) | set(DEFAULT_TARGETS) | ({target} if target else set())
+    header = pd.read_csv(path, nrows=0).columns
+    canonical = {c: ALIASES.get(c.strip(), c.strip()) for c in header}
+    usecols = [c for c in header if canonical[c] in wanted]
+    dtype = {c: np.float32 for c in usecols if canonical[c] in CANONICAL_FEATURES}
+
+    # pyarrow: multi-threaded parser; the C engine takes the same usecols/dtype
+    engine = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+    try:
+        return pd.read_csv(path, engine=engine, usecols=usecols, dtype=dtype)
+    except (ValueError, TypeError):
+        # non-numeric junk in a feature column: let _prepare_xy coerce it to NaN
+        return pd.read_csv(path, engine=engine, usecols=usecols)
+
+
 def _pick_target(df: pd.DataFrame, explicit: Optional[str]) -> str:
     if explicit and explicit in df.columns:
         return explicit
@@ -80,37 +115,28 @@ def _pick_target(df: pd.DataFrame, explicit: Optional[str]) -> str:
     )
 
 
-def _prepare_xy(df: pd.DataFrame, target_col: str) -> Tuple[pd.DataFrame, pd.Series]:
+def _prepare_xy(df: pd.DataFrame, target_col: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Return X as float32 (n, 7) in CANONICAL_FEATURES order and y as int8 {0,1}."""
     missing = [f for f in CANONICAL_FEATURES if f not in df.columns]
     if missing:
         raise ValueError(f"CSV is missing required features: {missing}")
 
-    X = df[CANONICAL_FEATURES].copy()
-    y = df[target_col].copy()
-
     # Coerce y to {0,1}
-    if y.dtype == "O":
-        y = (
-            y.astype(str)
-             .str.strip()
-             .str.lower()
-             .map({"1": 1, "true": 1, "yes": 1, "fail": 1,
-                   "0": 0, "false": 0, "no": 0, "pass": 0})
-        )
-    y = y.fillna(0).astype(int).clip(0, 1)
-
-    # Gentle sanitization / clipping
-    for col in CANONICAL_FEATURES:
-        X[col] = pd.to_numeric(X[col], errors="coerce")
-
-    X["restart_count_last_5m"] = X["restart_count_last_5m"].clip(lower=0)
-    X["cpu_usage_pct"] = X["cpu_usage_pct"].clip(lower=0, upper=100)
-    X["ready_replica_ratio"] = X["ready_replica_ratio"].clip(lower=0, upper=1)
-
-    for col in ("memory_usage_bytes", "network_receive_bytes_per_s",
-                "http_5xx_error_rate", "unavailable_replicas"):
-        X[col] = X[col].clip(lower=0)
+    y = df[target_col]
+    if not pd.api.types.is_numeric_dtype(y):   # object or pandas string dtype
+        labels = np.char.lower(np.char.strip(y.to_numpy().astype(str)))
+        y = np.isin(labels, POSITIVE_LABELS).astype(np.int8)   # anything else -> 0
+    else:
+        y = np.clip(np.nan_to_num(y.to_numpy(dtype=float), nan=0.0).astype(int), 0, 1).astype(np.int8)
+
+    X = df[CANONICAL_FEATURES]
+    if not all(pd.api.types.is_numeric_dtype(t) for t in X.dtypes):
+        X = X.apply(pd.to_numeric, errors="coerce")
 
+    # Gentle sanitization / clipping in one pass (NaN is kept for the imputers / HGB)
+    # Row-major copy: DataFrame.to_numpy() is a transposed column block (F-order)
+    X = np.array(X, dtype=np.float32, order="C", copy=True)
+    np.clip(X, FEATURE_LOWER, FEATURE_UPPER, out=X)
     return X, y
 
 
@@ -125,33 +151,17 @@ def _preprocessor_for_linear() -> ColumnTransformer:
                 ("imputer", SimpleImputer(strategy="median")),
                 ("log1p", FunctionTransformer(np.log1p, feature_names_out="one-to-one")),
                 ("scaler", RobustScaler()),
-            ]), HEAVY_TAIL),
+            ]), HEAVY_TAIL_IDX),
             ("rest", Pipeline([
                 ("imputer", SimpleImputer(strategy="median")),
                 ("scaler", StandardScaler()),
-            ]), REST),
+            ]), REST_IDX),
         ],
         remainder="drop",
     )
 
 
-def _preprocessor_for_trees() -> ColumnTransformer:
-    """
-    Trees don’t need scaling, but log1p helps stabilize large ranges.
-    """
-    return ColumnTransformer(
-        transformers=[
-            ("heavy", Pipeline([
-                ("imputer", SimpleImputer(strategy="median")),
-                ("log1p", FunctionTransformer(np.log1p, feature_names_out="one-to-one")),
-            ]), HEAVY_TAIL),
-            ("rest", SimpleImputer(strategy="median"), REST),
-        ],
-        remainder="drop",
-    )
-
-
-def _build_base_pipelines() -> Dict[str, Pipeline]:
+def _build_base_pipelines(cache_dir: Optional[str] = None) -> Dict[str, Pipeline]:
     lr = LogisticRegression(
         solver="lbfgs",  # stable for binary
         penalty="l2",
@@ -160,34 +170,180 @@ def _build_base_pipelines() -> Dict[str, Pipeline]:
         class_weight="balanced",
         random_state=42,
     )
-    gb = GradientBoostingClassifier(random_state=42)
+    # Histogram GBDT: binned splits, native NaN handling and monotone-invariant
+    # bins, so it needs neither imputation nor log1p.
+    gb = HistGradientBoostingClassifier(
+        max_iter=200,
+        learning_rate=0.1,
+        early_stopping=True,
+        random_state=42,
+    )
+
+    # Optional on-disk memo of the fitted preprocessor: CV folds, calibration folds
+    # and the final fit share it whenever they see the same training rows.
+    memory = joblib.Memory(cache_dir, verbose=0) if cache_dir else None
 
-    lr_pipe = Pipeline([("prep", _preprocessor_for_linear()), ("clf", lr)])
-    gb_pipe = Pipeline([("prep", _preprocessor_for_trees()), ("clf", gb)])
+    lr_pipe = Pipeline([("prep", _preprocessor_for_linear()), ("clf", lr)], memory=memory)
+    gb_pipe = Pipeline([("clf", gb)])   # no transformers to cache
     return {"logreg": lr_pipe, "gboost": gb_pipe}
 
 
-def _wrap_with_calibration(pipe: Pipeline, method: str) -> Pipeline | CalibratedClassifierCV:
-    if method == "none":
-        return pipe
-    # ✅ scikit-learn 1.7.0 uses `estimator=` (not `base_estimator=`)
-    return CalibratedClassifierCV(estimator=pipe, cv=5, method=method)
+def _without_cache(model):
+    """Drop Pipeline(memory=...) from the fitted model so model.pkl holds no training paths."""
+    pipes = [model]
+    if isinstance(model, CalibratedClassifierCV):
+        pipes = [_unfrozen(model.estimator)] + [
+            _unfrozen(cc.estimator) for cc in model.calibrated_classifiers_
+        ]
+    for pipe in pipes:
+        if isinstance(pipe, Pipeline):
+            pipe.memory = None
+    return model
 
 
-def _cv_scores(model, X: pd.DataFrame, y: pd.Series, n_splits=5) -> Dict[str, float]:
+def _fit_calibrated(pipe: Pipeline, X: np.ndarray, y: np.ndarray,
+                    method: str, calib_size: float) -> Pipeline | CalibratedClassifierCV:
+    """
+    Fit `pipe` once on (1 - calib_size) of the rows and calibrate it on the rest,
+    instead of CalibratedClassifierCV(cv=5) refitting the pipeline five times.
+    """
+    if method == "none":
+        return pipe.fit(X, y)
+    Xfit, Xcal, yfit, ycal = train_test_split(
+        X, y, test_size=calib_size, stratify=y, random_state=42
+    )
+    pipe.fit(Xfit, yfit)
+    try:
+        from sklearn.frozen import FrozenEstimator   # cv="prefit" was removed in sklearn 1.8
+        cal = CalibratedClassifierCV(estimator=FrozenEstimator(pipe), method=method)
+    except ImportError:
+        cal = CalibratedClassifierCV(estimator=pipe, cv="prefit", method=method)
+    return cal.fit(Xcal, ycal)
+
+
+def _fit_fold(model, X: np.ndarray, y: np.ndarray, tr_idx, va_idx) -> Tuple[float, float]:
+    model.fit(X[tr_idx], y[tr_idx])
+    # Candidates are uncalibrated: the decision score (logit) ranks exactly like
+    # predict_proba, and score > 0 is predict()'s p > 0.5, so skip the sigmoid
+    score = model.decision_function(X[va_idx])
+    yva = y[va_idx]
+    return roc_auc_score(yva, score), f1_score(yva, score > 0)
+
+
+def _cv_splits(X: np.ndarray, y: np.ndarray, n_splits=5) -> List[Tuple[np.ndarray, np.ndarray]]:
+    # Built once and shared by every candidate, so they are scored on identical folds
     skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
-    aucs, f1s = [], []
-    for tr_idx, va_idx in skf.split(X, y):
-        Xtr, Xva = X.iloc[tr_idx], X.iloc[va_idx]
-        ytr, yva = y.iloc[tr_idx], y.iloc[va_idx]
-        model.fit(Xtr, ytr)
-        prob = model.predict_proba(Xva)[:, 1]
-        pred = (prob >= 0.5).astype(int)
-        aucs.append(roc_auc_score(yva, prob))
-        f1s.append(f1_score(yva, pred))
+    return [(tr.astype(np.int32), va.astype(np.int32)) for tr, va in skf.split(X, y)]
+
+
+def _cv_scores(model, X: np.ndarray, y: np.ndarray,
+               splits: List[Tuple[np.ndarray, np.ndarray]], n_jobs=-1) -> Dict[str, float]:
+    # Folds are independent: fit a fresh clone of the model per fold, in parallel.
+    # Materialize once so every fold is a plain row gather (no-op for _prepare_xy output).
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.int8)
+    folds = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(clone(model), X, y, tr_idx, va_idx)
+        for tr_idx, va_idx in splits
+    )
+    aucs, f1s = zip(*folds)
     return {"roc_auc_mean": float(np.mean(aucs)), "f1_mean": float(np.mean(f1s))}
 
 
+# --------------------------- ONNX export ----------------------------- #
+
+def _onnx_function_transformer_shape(operator):
+    operator.outputs[0].type = operator.inputs[0].type.__class__(operator.inputs[0].type.shape)
+
+
+def _onnx_function_transformer(scope, operator, container):
+    # skl2onnx only knows identity FunctionTransformers; ours is log1p
+    from skl2onnx.algebra.onnx_ops import OnnxAdd, OnnxIdentity, OnnxLog
+
+    func, x, opv = operator.raw_operator.func, operator.inputs[0], container.target_opset
+    if func is None:
+        node = OnnxIdentity(x, op_version=opv, output_names=operator.outputs[0:1])
+    elif func is np.log1p:
+        one = np.array([1], dtype=np.float32)
+        node = OnnxLog(OnnxAdd(x, one, op_version=opv), op_version=opv,
+                       output_names=operator.outputs[0:1])
+    else:
+        raise RuntimeError(f"No ONNX conversion for FunctionTransformer({func!r})")
+    node.add_to(scope, container)
+
+
+def _onnx_convertible(model) -> Tuple[object, Dict[int, dict]]:
+    """
+    (model skl2onnx can parse, per-estimator converter options). Calibrated models are
+    copied with FrozenEstimator unwrapped, and their LogisticRegression emits raw scores:
+    skl2onnx only does that itself when the calibrated estimator *is* the classifier,
+    otherwise it would calibrate probabilities instead of decision_function values.
+    """
+    options: Dict[int, dict] = {}
+    if isinstance(model, CalibratedClassifierCV):
+        folds = [copy.copy(cc) for cc in model.calibrated_classifiers_]
+        for cc in folds:
+            cc.estimator = _unfrozen(cc.estimator)
+            clf = cc.estimator.steps[-1][1] if isinstance(cc.estimator, Pipeline) else cc.estimator
+            if not isinstance(clf, LogisticRegression):
+                raise RuntimeError("ONNX export of calibrated models needs a LogisticRegression")
+            if isinstance(cc.calibrators[0], IsotonicRegression):
+                # skl2onnx looks up the nearest isotonic threshold instead of interpolating
+                raise RuntimeError("skl2onnx cannot reproduce isotonic calibration; "
+                                   "use --calibration sigmoid or none")
+            options[id(clf)] = {"raw_scores": True}
+        model = copy.copy(model)
+        model.calibrated_classifiers_ = folds
+    options[id(model)] = {"zipmap": False}
+    return model, options
+
+
+def export_onnx(model, X_check: np.ndarray, out_path: Path, atol: float = 1e-4) -> float:
+    """
+    Convert the fitted model to ONNX (input "input": float32 (N, 7), outputs
+    "label"/"probabilities") and save it only if onnxruntime reproduces sklearn's
+    P(failure) on X_check within `atol`. Returns the max abs difference.
+    """
+    import onnxruntime as ort
+    from skl2onnx import convert_sklearn, update_registered_converter
+    from skl2onnx.common.data_types import FloatTensorType
+
+    update_registered_converter(
+        FunctionTransformer, "SklearnFunctionTransformer",
+        _onnx_function_transformer_shape, _onnx_function_transformer, overwrite=True,
+    )
+    convertible, options = _onnx_convertible(model)
+    onx = convert_sklearn(
+        convertible,
+        initial_types=[("input", FloatTensorType([None, len(CANONICAL_FEATURES)]))],
+        options=options,
+    )
+    meta = onx.metadata_props.add()
+    meta.key, meta.value = "features", json.dumps(CANONICAL_FEATURES)
+    blob = onx.SerializeToString()
+
+    sess = ort.InferenceSession(blob, providers=["CPUExecutionProvider"])
+    Xc = np.ascontiguousarray(X_check, dtype=np.float32)
+    got = sess.run(["probabilities"], {"input": Xc})[0][:, 1]
+    err = float(np.abs(got - model.predict_proba(X_check)[:, 1]).max())
+    if err > atol:
+        raise RuntimeError(f"ONNX output differs from sklearn by {err:.3g}; not saved")
+    out_path.write_bytes(blob)
+    return err
+
+
+# ------------------------ safetensors export -------------------------- #
+
+def export_safetensors(model, out_path: Path) -> None:
+    """
+    Save just the fitted stats of a linear model (impute/log1p/scale, LR weights,
+    calibration) next to model.pkl, so predict_failure.py and the API can score it
+    with NumPy alone. Raises convert_to_safetensors.UnsupportedModel for GBDT.
+    """
+    tensors, metadata = export_tensors(model)
+    save_file(tensors, str(out_path), metadata=metadata)
+
+
 # ------------------------------ CLI ---------------------------------- #
 
 def parse_args() -> argparse.Namespace:
@@ -195,19 +351,39 @@ def parse_args() -> argparse.Namespace:
         description="Train failure-risk model on Prometheus features and export model.pkl"
     )
     p.add_argument("--csv", default="prom_features.csv",
-                   help="Path to input CSV containing the 7 features + target column.")
+                   help="Path to input CSV (or .parquet) containing the 7 features + target column.")
     p.add_argument("--target", default=None,
                    help=f"Target column (default: first of {DEFAULT_TARGETS} found).")
     p.add_argument("--model", choices=["auto", "logreg", "gboost"],
                    default="auto", help="Choose model or let CV pick best.")
     p.add_argument("--calibration", choices=["isotonic", "sigmoid", "none"],
                    default="isotonic", help="Probability calibration method.")
+    p.add_argument("--calib-size", type=float, default=0.2,
+                   help="Share of the training split held out to fit the calibrator "
+                        "(the model itself is fit once on the rest).")
     p.add_argument("--test-size", type=float, default=0.2,
                    help="Holdout size for final report (stratified).")
     p.add_argument("--out-model", default="ml_model/models/model.pkl",
                    help="Where to save the trained model.")
     p.add_argument("--out-metrics", default="ml_model/models/metrics.json",
                    help="Where to save training metrics JSON.")
+    p.add_argument("--compress", type=int, default=0, choices=range(10), metavar="0-9",
+                   help="joblib compression level for model.pkl (default 0: uncompressed, "
+                        "so predict_failure.py can memory-map it; >0 disables mmap).")
+    p.add_argument("--auc-target", type=float, default=0.99,
+                   help="With --model auto, stop evaluating candidates once one reaches "
+                        "this CV ROC-AUC (set > 1 to always compare all).")
+    p.add_argument("--cache-dir", default=os.getenv("TRAIN_CACHE_DIR") or None,
+                   help="Cache fitted preprocessors here (joblib.Memory) across CV/calibration "
+                        "folds; env TRAIN_CACHE_DIR. Off by default: on small CSVs hashing "
+                        "the inputs costs more than refitting.")
+    p.add_argument("--n-jobs", type=int, default=-1,
+                   help="Parallel CV folds (-1 = all cores, 1 = sequential).")
+    p.add_argument("--onnx", action="store_true",
+                   help="Also export <out-model>.onnx for onnxruntime scoring "
+                        "(needs skl2onnx + onnxruntime). Only logreg with --calibration "
+                        "sigmoid or none converts faithfully; isotonic and gboost "
+                        "models are skipped with a message.")
     return p.parse_args()
 
 
@@ -218,7 +394,7 @@ def main() -> int:
     out_model.parent.mkdir(parents=True, exist_ok=True)
     out_metrics.parent.mkdir(parents=True, exist_ok=True)
 
-    df = pd.read_csv(args.csv)
+    df = _read_table(args.csv, args.target)
     df = _normalize_columns(df)
 
     target_col = _pick_target(df, args.target)
@@ -229,26 +405,33 @@ def main() -> int:
         X, y, test_size=args.test_size, stratify=y, random_state=42
     )
 
-    base_pipes = _build_base_pipelines()
+    base_pipes = _build_base_pipelines(args.cache_dir)
 
     if args.model in ("logreg", "gboost"):
         candidates = [args.model]
     else:
-        candidates = ["logreg", "gboost"]
+        candidates = ["logreg", "gboost"]   # cheapest first, see --auc-target
 
     results: Dict[str, Dict[str, float]] = {}
-    best_name, best_model, best_cv = None, None, -1.0
+    best_name, best_cv = None, -1.0
 
+    # Candidates are compared uncalibrated: calibration is a monotone remap of the
+    # score, so ROC-AUC ranking is (up to isotonic ties) unaffected. Only the chosen
+    # pipeline gets calibrated, once, below.
+    splits = _cv_splits(Xtr, ytr, n_splits=5)
     for name in candidates:
-        model = _wrap_with_calibration(base_pipes[name], args.calibration)
-        scores = _cv_scores(model, Xtr, ytr, n_splits=5)
+        scores = _cv_scores(base_pipes[name], Xtr, ytr, splits, n_jobs=args.n_jobs)
         results[name] = scores
         if scores["roc_auc_mean"] > best_cv:
-            best_name, best_model, best_cv = name, model, scores["roc_auc_mean"]
-
-    # Fit best on all training and evaluate on holdout
-    assert best_model is not None
-    best_model.fit(Xtr, ytr)
+            best_name, best_cv = name, scores["roc_auc_mean"]
+        if best_cv >= args.auc_target:
+            print(f"{name} CV ROC-AUC {best_cv:.4f} >= --auc-target; skipping remaining candidates")
+            break
+
+    # Fit + calibrate best on the training split and evaluate on holdout
+    assert best_name is not None
+    best_model = _fit_calibrated(base_pipes[best_name], Xtr, ytr,
+                                 args.calibration, args.calib_size)
     prob = best_model.predict_proba(Xte)[:, 1]
     pred = (prob >= 0.5).astype(int)
 
@@ -271,11 +454,27 @@ def main() -> int:
         "target": target_col,
     }
 
-    joblib.dump(best_model, out_model)
+    joblib.dump(_without_cache(best_model), out_model, compress=args.compress, protocol=5)
     out_metrics.write_text(json.dumps(report, indent=2))
     print(json.dumps(report, indent=2))
     print(f"Saved model to {out_model}")
     print(f"Saved metrics to {out_metrics}")
+    # never leave an export of an older model behind
+    out_tensors = out_model.with_suffix(".safetensors")
+    out_onnx = out_model.with_suffix(".onnx")
+    out_tensors.unlink(missing_ok=True)
+    out_onnx.unlink(missing_ok=True)
+    try:
+        export_safetensors(best_model, out_tensors)
+        print(f"Saved NumPy-scorable stats to {out_tensors}")
+    except Exception as e:
+        print(f"safetensors export skipped: {e}")
+    if args.onnx:
+        try:
+            err = export_onnx(best_model, Xte, out_onnx)
+            print(f"Saved ONNX model to {out_onnx} (max abs diff vs sklearn {err:.2g})")
+        except Exception as e:
+            print(f"ONNX export skipped: {e}")
     return 0
 
 
@@ -2,30 +2,91 @@
 import subprocess
 import sys
 import argparse
+import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import os
+from datetime import datetime, timezone
+from functools import lru_cache
+
+try:  # optional: one keep-alive API connection instead of a kubectl fork per call
+    from kubernetes import client as k8s_client, config as k8s_config
+except ImportError:
+    k8s_client = k8s_config = None
 
 MAX_ATTEMPTS = 3
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")  # from GitHub Secret or ENV
+SLACK_TIMEOUT = 3  # seconds; an unreachable Slack must not stall the healing step
+
+# Pooled keep-alive session: repeated alerts skip the TCP/TLS handshake.
+# Retry only covers connection failures (urllib3 never re-sends a POST after a read error).
+_SLACK = requests.Session()
+_SLACK.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2,
+                                     max_retries=Retry(total=2, backoff_factor=0.3)))
 
 def run_cmd(cmd, capture_output=False):
     print(f"> {' '.join(cmd)}")
     result = subprocess.run(cmd, check=True, capture_output=capture_output, text=True)
     return result.stdout.strip() if capture_output else None
 
+@lru_cache(maxsize=None)
+def kube_apis():
+    """(AppsV1Api, CoreV1Api) sharing one client, or None to fall back to kubectl."""
+    if k8s_client is None:
+        return None
+    try:
+        try:
+            k8s_config.load_incluster_config()
+        except k8s_config.ConfigException:
+            k8s_config.load_kube_config()
+    except Exception as e:
+        print(f"[INFO] Kubernetes client unavailable ({e}); using kubectl.")
+        return None
+    api = k8s_client.ApiClient()
+    return k8s_client.AppsV1Api(api), k8s_client.CoreV1Api(api)
+
+def wait_for_rollout(apps, deployment, namespace, timeout=300, interval=2):
+    # same completion rule as `kubectl rollout status`
+    print(f"> watch rollout deployment/{deployment} -n {namespace}")
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        dep = apps.read_namespaced_deployment_status(deployment, namespace)
+        st, want = dep.status, dep.spec.replicas or 0
+        if ((st.observed_generation or 0) >= dep.metadata.generation
+                and (st.updated_replicas or 0) == want
+                and (st.replicas or 0) == want
+                and (st.available_replicas or 0) == want):
+            return
+        time.sleep(interval)
+    raise RuntimeError(f"deployment/{deployment} rollout did not finish within {timeout}s")
+
 def get_attempt(deployment, namespace):
     try:
-        out = run_cmd([
-            "kubectl", "get", "deployment", deployment,
-            "-n", namespace,
-            "-o", "jsonpath={.metadata.annotations.healing\\.attempt}"
-        ], capture_output=True)
+        apis = kube_apis()
+        if apis:
+            print(f"> get deployment/{deployment} -n {namespace}")
+            dep = apis[0].read_namespaced_deployment(deployment, namespace)
+            out = (dep.metadata.annotations or {}).get("healing.attempt")
+        else:
+            out = run_cmd([
+                "kubectl", "get", "deployment", deployment,
+                "-n", namespace,
+                "-o", "jsonpath={.metadata.annotations.healing\\.attempt}"
+            ], capture_output=True)
         return int(out) if out else 0
     except Exception:
         return 0
 
 def set_attempt(deployment, namespace, attempt):
+    apis = kube_apis()
+    if apis:
+        print(f"> annotate deployment/{deployment} healing.attempt={attempt} -n {namespace}")
+        apis[0].patch_namespaced_deployment(
+            deployment, namespace, {"metadata": {"annotations": {"healing.attempt": str(attempt)}}}
+        )
+        return
     run_cmd([
         "kubectl", "annotate", "deployment", deployment,
         f"healing.attempt={attempt}", "--overwrite", "-n", namespace
@@ -33,18 +94,37 @@ def set_attempt(deployment, namespace, attempt):
 
 def restart_and_scale(deployment, namespace, replicas):
     print("[STEP] Restarting deployment and scaling replicas")
-    run_cmd(["kubectl", "rollout", "restart", f"deployment/{deployment}", "-n", namespace])
-    run_cmd(["kubectl", "scale", "deployment", deployment, f"--replicas={replicas}", "-n", namespace])
+    # One merge patch sets replicas and bumps the pod template annotation (what
+    # `kubectl rollout restart` does), so there is no half-applied intermediate state
+    restarted_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    patch = {"spec": {
+        "replicas": replicas,
+        "template": {"metadata": {"annotations": {"kubectl.kubernetes.io/restartedAt": restarted_at}}},
+    }}
+    apis = kube_apis()
+    if apis:
+        print(f"> patch deployment/{deployment} -n {namespace} {json.dumps(patch)}")
+        apis[0].patch_namespaced_deployment(deployment, namespace, patch)
+        wait_for_rollout(apis[0], deployment, namespace)
+        return
+    run_cmd(["kubectl", "patch", "deployment", deployment, "-n", namespace,
+             "--type=merge", "-p", json.dumps(patch)])
     run_cmd(["kubectl", "rollout", "status", f"deployment/{deployment}", "-n", namespace, "--timeout=5m"])
 
 def clear_cache_inside_pod(deployment, namespace, container=None):
     print("[STEP] Attempting cache clear inside pod...")
     try:
-        pod = run_cmd([
-            "kubectl", "get", "pods", "-n", namespace,
-            "-l", f"app={deployment}",
-            "-o", "jsonpath={.items[0].metadata.name}"
-        ], capture_output=True)
+        apis = kube_apis()
+        if apis:
+            pods = apis[1].list_namespaced_pod(namespace, label_selector=f"app={deployment}").items
+            pod = pods[0].metadata.name if pods else ""
+        else:
+            pod = run_cmd([
+                "kubectl", "get", "pods", "-n", namespace,
+                "-l", f"app={deployment}",
+                "-o", "jsonpath={.items[0].metadata.name}"
+            ], capture_output=True)
+        # exec needs a SPDY/websocket stream; kubectl already does that well
         cmd = ["kubectl", "exec", pod, "-n", namespace]
         if container:
             cmd += ["-c", container]
@@ -56,7 +136,12 @@ def clear_cache_inside_pod(deployment, namespace, container=None):
 
 def rollback(deployment, namespace):
     print("[STEP] Rolling back deployment...")
+    # undo has no single API call (kubectl copies the previous ReplicaSet's template)
     run_cmd(["kubectl", "rollout", "undo", f"deployment/{deployment}", "-n", namespace])
+    apis = kube_apis()
+    if apis:
+        wait_for_rollout(apis[0], deployment, namespace)
+        return
     run_cmd(["kubectl", "rollout", "status", f"deployment/{deployment}", "-n", namespace, "--timeout=5m"])
 
 def send_slack_alert(text):
@@ -64,7 +149,7 @@ def send_slack_alert(text):
         print("[WARN] SLACK_WEBHOOK_URL is not set. Skipping Slack alert.")
         return
     try:
-        r = requests.post(SLACK_WEBHOOK_URL, json={"text": text})
+        r = _SLACK.post(SLACK_WEBHOOK_URL, json={"text": text}, timeout=SLACK_TIMEOUT)
         if r.status_code == 200:
             print("[INFO] Slack alert sent.")
         else:
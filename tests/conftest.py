@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# ml_model/ scripts import their siblings by bare name (as when run from that directory)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "ml_model"))
+
+from predict_failure import load_model
+
+
+@pytest.fixture(scope="session")
+def failure_model():
+    # one deserialization per session; load_model() is itself cached per process
+    return load_model()
+
+
+@pytest.fixture(scope="session")
+def toy_data():
+    """Small synthetic (X float32 with some NaNs, y int8) in DEFAULT_FEATURES order."""
+    n = 600
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.poisson(1.0, n),                 # restarts
+        rng.uniform(0, 100, n),              # cpu %
+        rng.lognormal(19, 1, n),             # memory bytes
+        rng.uniform(0, 1, n),                # ready ratio
+        rng.integers(0, 4, n),               # unavailable replicas
+        rng.lognormal(11, 1, n),             # network bytes/s
+        rng.uniform(0, 0.2, n),              # 5xx rate
+    ]).astype(np.float32)
+    logit = 0.8 * X[:, 0] + 0.03 * X[:, 1] - 3.0 * X[:, 3] + 10.0 * X[:, 6] - 1.0
+    y = (rng.uniform(size=n) < 1 / (1 + np.exp(-logit))).astype(np.int8)
+    X[rng.uniform(size=X.shape) < 0.02] = np.nan   # exercise the imputer
+    return X, y
@@ -1,4 +1,110 @@
 import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app" / "src"))
+import app as api
+
+SAMPLE = {
+    "restart_count_last_5m": 1, "cpu_usage_pct": 20, "memory_usage_bytes": 2**24 + 1,
+    "ready_replica_ratio": 0.9, "unavailable_replicas": 0,
+    "network_receive_bytes_per_s": 0, "http_5xx_error_rate": 0.0,
+}
+
+@pytest.fixture
+def client():
+    return api.app.test_client()
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(t=1000.0)
+    monkeypatch.setattr(api.time, "monotonic", lambda: now.t)
+    return now
 
 def test_app_file_exists():
     assert os.path.exists("app/src/app.py"), "app/src/app.py must exist"
+
+def test_window_counter_resets_after_window(clock):
+    counter = api._LocalWindowCounter(window=10)
+    assert [counter.hit("ip"), counter.hit("ip")] == [1, 2]
+    clock.t += 10
+    assert counter.hit("ip") == 1
+
+def test_window_counter_purges_stale_keys(clock):
+    counter = api._LocalWindowCounter(window=1)
+    counter.hit("old")
+    clock.t += api._LocalWindowCounter.GC_AFTER_WINDOWS
+    counter.hit("new")
+    assert "old" not in counter.counts and "new" in counter.counts
+
+def test_predict_over_limit_returns_429(monkeypatch, client):
+    counter = api._LocalWindowCounter(window=60)
+    counter.counts["127.0.0.1"] = (api.Config.RATE_LIMIT, time.monotonic())
+    monkeypatch.setattr(api, "_rate_counter", counter)
+    monkeypatch.setattr(api.Config, "DISABLE_RATE_LIMIT", False)
+    r = client.post("/predict", json=SAMPLE)
+    assert r.status_code == 429
+    assert r.get_json() == {"ok": False, "error": "rate limit exceeded"}
+
+def test_redis_errors_fall_back_to_local_counts(monkeypatch):
+    class RedisError(Exception):
+        pass
+
+    def unreachable(**_):
+        raise RedisError("connection refused")
+
+    fake_redis = SimpleNamespace(
+        exceptions=SimpleNamespace(RedisError=RedisError),
+        Redis=SimpleNamespace(from_url=lambda url, **kw: SimpleNamespace(register_script=lambda s: unreachable)),
+    )
+    monkeypatch.setattr(api, "redis", fake_redis)
+    counter = api._RedisWindowCounter("redis://unused:6379/0", window=60)
+    assert [counter.hit("ip"), counter.hit("ip")] == [1, 2]
+
+def test_validate_returns_an_independent_row_per_request():
+    first, err1 = api._validate(SAMPLE)
+    second, err2 = api._validate({**SAMPLE, "cpu_usage_pct": 50})
+    assert err1 is None and err2 is None
+    assert first is not second
+    assert first[1] == 20 and second[1] == 50
+
+def _requests_total(client, method, status):
+    body = client.get("/metrics").get_data(as_text=True)   # /metrics flushes pending counts
+    labels = f'{{method="{method}",status="{status}"}}'
+    for line in body.splitlines():
+        if line.startswith("http_request_total" + labels):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_predict_echoes_float64_features(client):
+    r = client.post("/predict", json=SAMPLE)
+    assert r.status_code == 200
+    body = r.get_json()
+    assert body["ok"] is True and 0.0 <= body["probability"] <= 1.0
+    assert body["features"] == {k: float(v) for k, v in SAMPLE.items()}
+
+@pytest.mark.parametrize("data", [b"{bad", b"[1, 2]", b""])
+def test_predict_rejects_non_object_bodies(client, data):
+    r = client.post("/predict", data=data, content_type="application/json")
+    assert r.status_code == 400
+    assert r.get_json()["ok"] is False
+
+def test_metrics_report_flushed_request_counts(client):
+    before = _requests_total(client, "POST", "400")
+    for _ in range(3):
+        client.post("/predict", data=b"{bad", content_type="application/json")
+    api._flush_pending()
+    assert _requests_total(client, "POST", "400") == before + 3
+
+def test_rate_limited_requests_are_counted(monkeypatch, client):
+    counter = api._LocalWindowCounter(window=60)
+    counter.counts["127.0.0.1"] = (api.Config.RATE_LIMIT, time.monotonic())
+    monkeypatch.setattr(api, "_rate_counter", counter)
+    monkeypatch.setattr(api.Config, "DISABLE_RATE_LIMIT", False)
+    before = _requests_total(client, "POST", "429")
+    assert client.post("/predict", json=SAMPLE).status_code == 429
+    assert _requests_total(client, "POST", "429") == before + 1
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from safetensors.numpy import save_file
+
+from convert_to_safetensors import LinearScorer, export_tensors
+from train_model import _build_base_pipelines, _fit_calibrated
+
+
+@pytest.mark.parametrize("calibration", ["isotonic", "sigmoid", "none"])
+def test_linear_scorer_matches_sklearn(tmp_path, toy_data, calibration):
+    X, y = toy_data
+    model = _fit_calibrated(_build_base_pipelines()["logreg"], X, y, calibration, 0.2)
+    tensors, metadata = export_tensors(model)
+    path = tmp_path / "model.safetensors"
+    save_file(tensors, str(path), metadata=metadata)
+
+    scorer = LinearScorer(path)
+    assert scorer.calibration == calibration
+    X64 = X.astype(np.float64)   # both serving paths score float64 rows
+    np.testing.assert_allclose(scorer.predict_proba(X64), model.predict_proba(X64), atol=1e-6)
+
+
+
+@pytest.mark.parametrize("shift", [1e4, -1e4])
+@pytest.mark.parametrize("calibration", ["sigmoid", "none"])
+def test_linear_scorer_saturates_without_overflow(tmp_path, toy_data, calibration, shift):
+    X, y = toy_data
+    model = _fit_calibrated(_build_base_pipelines()["logreg"], X, y, calibration, 0.2)
+    tensors, metadata = export_tensors(model)
+    path = tmp_path / "model.safetensors"
+    save_file(tensors, str(path), metadata=metadata)
+
+    scorer = LinearScorer(path)
+    scorer.intercept = scorer.intercept + shift   # push every margin far past exp()'s range
+    with np.errstate(over="raise"):
+        p = scorer.predict_proba(X[:5].astype(np.float64))
+    assert np.isfinite(p).all()
+    np.testing.assert_allclose(p.sum(axis=1), 1.0)
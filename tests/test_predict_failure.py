@@ -1,12 +1,50 @@
-from ml_model.predict_failure import predict_failure
+import numpy as np
 
-def test_prediction_output_format():
+from predict_failure import (
+    DEFAULT_FEATURES, predict_failure, predict_failure_batch, predict_from_dict,
+)
+
+def test_prediction_output_format(failure_model):
     metrics = {
         "build_time": 15,
         "error_count": 1,
         "cpu_usage": 75,
         "test_pass_rate": 0.9,
     }
-    prob = predict_failure(metrics)
+    prob = predict_failure(metrics, failure_model)
     assert isinstance(prob, float)
     assert 0.0 <= prob <= 1.0
+
+
+class _RecordingModel:
+    def __init__(self):
+        self.rows = []
+
+    def predict_proba(self, X):
+        self.rows.append(np.array(X, copy=True))
+        return np.array([[0.75, 0.25]])
+
+
+def test_missing_features_default_to_zero_for_the_model():
+    model = _RecordingModel()
+    assert predict_from_dict({"cpu_usage_pct": 20}, model, DEFAULT_FEATURES) == 0.25
+    np.testing.assert_array_equal(model.rows[0], [[0, 20, 0, 0, 0, 0, 0]])
+
+
+def test_heuristic_treats_missing_readiness_as_fully_ready():
+    # bias 0.35 is cancelled by the readiness term only when the ratio defaults to 1.0
+    assert predict_from_dict({}, None, DEFAULT_FEATURES) == 0.0
+    assert predict_from_dict({"ready_replica_ratio": 0}, None, DEFAULT_FEATURES) == 0.35
+
+
+def test_batch_matches_per_row_scoring(toy_data):
+    from train_model import _build_base_pipelines, _fit_calibrated
+
+    X, y = toy_data
+    fitted = _fit_calibrated(_build_base_pipelines()["logreg"], X, y, "sigmoid", 0.2)
+    rows = np.nan_to_num(X[:25]).astype(np.float64)
+    for model in ((fitted, DEFAULT_FEATURES), (None, DEFAULT_FEATURES)):
+        batch = predict_failure_batch(rows, model)
+        assert batch.dtype == np.float32 and batch.shape == (len(rows),)
+        expected = [predict_from_dict(dict(zip(DEFAULT_FEATURES, r)), *model) for r in rows]
+        np.testing.assert_allclose(batch, expected, rtol=1e-6, atol=1e-7)
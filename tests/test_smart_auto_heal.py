@@ -3,8 +3,9 @@ import sys
 from unittest import mock
 import pipeline.scripts.smart_auto_heal as auto_heal
 
+@mock.patch.object(auto_heal, "kube_apis", return_value=None)
 @mock.patch("subprocess.run")
-def test_auto_heal_kubectl_trigger(mock_run):
+def test_auto_heal_kubectl_trigger(mock_run, _mock_apis):
     mock_run.return_value = mock.Mock(returncode=0)
     sys.argv = [
         "smart_auto_heal.py",
@@ -19,3 +20,32 @@ def test_auto_heal_kubectl_trigger(mock_run):
     assert mock_run.called
     cmd = mock_run.call_args[0][0]
     assert "kubectl" in cmd[0]
+
+@mock.patch("subprocess.run")
+def test_auto_heal_client_single_merge_patch(mock_run):
+    apps, core = mock.Mock(), mock.Mock()
+    apps.read_namespaced_deployment.return_value.metadata.annotations = {}
+    dep = apps.read_namespaced_deployment_status.return_value
+    dep.spec.replicas = 2
+    dep.metadata.generation = 1
+    dep.status = mock.Mock(observed_generation=1, updated_replicas=2, replicas=2, available_replicas=2)
+    sys.argv = [
+        "smart_auto_heal.py",
+        "--deployment", "my-app",
+        "--namespace", "prod",
+        "--replicas", "2"
+    ]
+    with mock.patch.object(auto_heal, "kube_apis", return_value=(apps, core)):
+        try:
+            auto_heal.main()
+        except SystemExit:
+            pass
+    assert not mock_run.called
+    patches = apps.patch_namespaced_deployment.call_args_list
+    name, ns, body = patches[0][0]
+    assert (name, ns) == ("my-app", "prod")
+    assert body["spec"]["replicas"] == 2
+    assert "kubectl.kubernetes.io/restartedAt" in body["spec"]["template"]["metadata"]["annotations"]
+    assert not apps.patch_namespaced_deployment_scale.called
+    # the only other write records the attempt
+    assert patches[1][0][2] == {"metadata": {"annotations": {"healing.attempt": "1"}}}
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from train_model import _build_base_pipelines, _fit_calibrated, export_onnx
+
+
+@pytest.mark.parametrize("calibration", ["sigmoid", "none"])
+def test_onnx_export_matches_sklearn(tmp_path, toy_data, calibration):
+    pytest.importorskip("skl2onnx")
+    pytest.importorskip("onnxruntime")
+    from predict_failure import _OnnxModel
+
+    X, y = toy_data
+    model = _fit_calibrated(_build_base_pipelines()["logreg"], X, y, calibration, 0.2)
+    path = tmp_path / "model.onnx"
+    export_onnx(model, X, path)
+
+    onnx_model = _OnnxModel(path)
+    np.testing.assert_allclose(
+        onnx_model.predict_proba(X)[:, 1], model.predict_proba(X)[:, 1], atol=1e-4
+    )
+
+
+def test_onnx_export_refuses_isotonic(tmp_path, toy_data):
+    pytest.importorskip("skl2onnx")
+    pytest.importorskip("onnxruntime")
+
+    X, y = toy_data
+    model = _fit_calibrated(_build_base_pipelines()["logreg"], X, y, "isotonic", 0.2)
+    with pytest.raises(RuntimeError, match="isotonic"):
+        export_onnx(model, X, tmp_path / "model.onnx")
+    assert not (tmp_path / "model.onnx").exists()